@@ -1,10 +1,100 @@
-from quart import Quart, jsonify
+import asyncio
+import logging
+import logging.handlers
+import queue
+import time
+from quart import Quart, Response, jsonify, request
 from config.database import db_config
 from models.article import Article
 
+logger = logging.getLogger(__name__)
+
 # Create Quart application
 app = Quart(__name__)
 
+# Health results are reused for a few seconds so frequent liveness polls don't hammer the database
+HEALTH_CHECK_CACHE_TTL = 5  # seconds
+_health_cache = {'expires_at': 0.0, 'db_healthy': False}
+
+# Article listings are always paged so the created_at index scan can stop early
+ARTICLES_DEFAULT_LIMIT = 50
+ARTICLES_MAX_LIMIT = 500
+
+# Log records are handed to a background thread so handlers never block the event loop;
+# only installed while serving, so importing this module leaves logging untouched
+_log_handler = None
+_log_listener = None
+
+def _start_logging():
+    """Route root logging through a queue drained by a listener thread"""
+    global _log_handler, _log_listener
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+    
+    # basicConfig is a no-op if the server (or an embedding script) already configured logging
+    if handler in logging.getLogger().handlers:
+        _log_handler = handler
+        _log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+        _log_listener.start()
+
+def _stop_logging():
+    """Flush queued log records and remove the queue handler"""
+    global _log_handler, _log_listener
+    if _log_listener is not None:
+        logging.getLogger().removeHandler(_log_handler)
+        _log_listener.stop()
+        _log_handler = None
+        _log_listener = None
+
+# Set once create_table has run; until then /health retries the startup database work
+_schema_ready = False
+
+async def _prepare_database():
+    """Connect (creating pools if needed) and bring the schema up to date, False if unreachable"""
+    global _schema_ready
+    # test_connection creates the pools lazily, so this recovers once the database is back
+    if not await db_config.test_connection():
+        return False
+    
+    if not _schema_ready:
+        # Idempotent: creates the table if it doesn't exist
+        _schema_ready = await Article.create_table(build_indexes=False)
+        if _schema_ready:
+            # Index builds can take minutes on a large table, so don't hold up serving
+            app.add_background_task(Article.create_indexes)
+    return True
+
+def _non_negative_int_arg(name, default):
+    """Read a non-negative integer query argument, raising ValueError if it's malformed"""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    
+    number = int(value)
+    if number < 0:
+        raise ValueError(f"'{name}' must not be negative")
+    return number
+
+@app.before_serving
+async def startup():
+    """Initialize database on startup"""
+    _start_logging()
+    logger.info("Starting Quart Article API (event loop: %s)", type(asyncio.get_running_loop()).__name__)
+    logger.info("Checking database connection...")
+    
+    # Keep serving without a database; pools are created lazily once it's reachable
+    if await _prepare_database():
+        logger.info("✓ Database connection successful")
+    else:
+        logger.error("✗ Database connection failed - check your .env file")
+
+@app.after_serving
+async def shutdown():
+    """Release pooled database connections"""
+    await db_config.close_pool()
+    _stop_logging()
+
 @app.route('/')
 async def index():
     """Basic info endpoint"""
@@ -13,17 +103,44 @@ async def index():
         'status': 'healthy'
     })
 
+@app.route('/articles')
+async def list_articles():
+    """List articles newest first (without raw_content), paged with ?limit=&offset="""
+    try:
+        limit = min(_non_negative_int_arg('limit', ARTICLES_DEFAULT_LIMIT), ARTICLES_MAX_LIMIT)
+        offset = _non_negative_int_arg('offset', 0)
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'error': f"Invalid paging parameters: {e}"
+        }), 400
+    
+    try:
+        body = await Article.get_all_json(limit=limit, offset=offset)
+    except Exception as e:
+        logger.error("Error retrieving articles: %s", e)
+        return jsonify({
+            'status': 'error',
+            'error': str(e)
+        }), 500
+    
+    return Response(body, content_type='application/json')
+
 @app.route('/health')
 async def health_check():
     """Application health check"""
     try:
-        # Test database connection
-        db_healthy = db_config.test_connection()
+        # Test database connection, reusing a recent result if still fresh
+        now = time.monotonic()
+        if now >= _health_cache['expires_at']:
+            _health_cache['db_healthy'] = await _prepare_database()
+            _health_cache['expires_at'] = now + HEALTH_CHECK_CACHE_TTL
+        db_healthy = _health_cache['db_healthy']
         
         return jsonify({
             'status': 'healthy' if db_healthy else 'unhealthy',
             'database': 'connected' if db_healthy else 'disconnected',
-            'table_exists': Article.table_exists()
+            'table_exists': await Article.table_exists()
         })
     except Exception as e:
         return jsonify({
@@ -32,21 +149,13 @@ async def health_check():
         }), 500
 
 if __name__ == '__main__':
-    # Initialize database on startup
-    print("Starting Quart Article API...")
-    print("Checking database connection...")
-    
-    if db_config.test_connection():
-        print("✓ Database connection successful")
-        
-        # Create table if it doesn't exist
-        if not Article.table_exists():
-            print("Creating articles table...")
-            Article.create_table()
-        else:
-            print("✓ Articles table exists")
-    else:
-        print("✗ Database connection failed - check your .env file")
+    # Use uvloop's faster event loop where available (not supported on Windows);
+    # the loop in use is logged on startup
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     
-    # Run the application
+    # Run the application (database is initialized in the before_serving hook)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
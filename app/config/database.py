@@ -1,45 +1,140 @@
+import asyncio
+import logging
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import asyncpg
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class DatabaseConfig:
     """Database configuration and connection management"""
     
     def __init__(self):
         self.host = os.getenv('DB_HOST')
-        self.port = os.getenv('DB_PORT')
+        # Cast once here so a malformed port fails at import rather than on first connect
+        self.port = int(os.getenv('DB_PORT', '5432'))
         self.name = os.getenv('DB_NAME')
         self.user = os.getenv('DB_USER')
         self.password = os.getenv('DB_PASSWORD')
-        self.url = f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
+        # Keyword form avoids URL parsing per connect and keeps the password out of a printable DSN
+        self.conn_kwargs = dict(
+            host=self.host,
+            port=self.port,
+            database=self.name,
+            user=self.user,
+            password=self.password,
+            # Fail connection attempts quickly; pools are retried lazily while the database is down
+            timeout=5
+        )
+        
+        # Set DB_PGBOUNCER=true when DB_HOST/DB_PORT point at PgBouncer in transaction pooling mode
+        self.use_pgbouncer = os.getenv('DB_PGBOUNCER', '').lower() in ('1', 'true', 'yes')
+        
+        # Per-process connection budget covering all three pools (health, read, write),
+        # (cores * 2) + 1 by default; every worker process gets its own pools, so keep
+        # this small and let PgBouncer multiplex. Budgets below 5 are rounded up to 5.
+        self.pool_max_size = int(os.getenv('DB_POOL_MAX_SIZE', (os.cpu_count() or 1) * 2 + 1))
+        
+        # Optional explicit write pool size (taken out of the budget); by default a quarter
+        # of the budget, but never fewer than 2 so one long COPY or DDL can't stall all writes
+        self.write_pool_size = int(os.getenv('DB_WRITE_POOL_SIZE', '0')) or None
+        
+        self.pool = None
+        self.read_pool = None
+        self.health_pool = None
+        # Serializes lazy pool creation so concurrent requests don't each build pools
+        self._init_lock = asyncio.Lock()
     
-    def get_connection(self):
-        """Get a database connection"""
+    async def init_pool(self):
+        """Create the shared connection pools (call once from the running event loop)"""
+        if self.pool is not None:
+            return self.pool
+        
+        # Settings shared by the read and write pools
+        pool_options = dict(
+            max_queries=50000,
+            max_inactive_connection_lifetime=300,
+            command_timeout=10,
+            # Queries with arguments are auto-prepared and cached per connection by SQL text;
+            # PgBouncer in transaction mode can't keep prepared statements, so disable it there
+            statement_cache_size=0 if self.use_pgbouncer else 1024
+        )
+        
+        # PgBouncer in transaction mode doesn't keep session settings between transactions
+        # (and rejects unknown startup parameters), so read-only sessions are only used directly
+        read_settings = {} if self.use_pgbouncer else {'default_transaction_read_only': 'on'}
+        
+        # Reserve the health pool's connections, then split the rest roughly one write
+        # connection for every three read connections, with at least 2 writers
+        # (the default budget of 9 ends up as health 2, read 5, write 2)
+        health_max_size = 2
+        query_budget = max(3, self.pool_max_size - health_max_size)
+        write_max_size = self.write_pool_size or max(2, query_budget // 4)
+        read_max_size = max(1, query_budget - write_max_size)
+        
         try:
-            return psycopg2.connect(
-                self.url,
-                cursor_factory=RealDictCursor  # This returns dict-like rows
+            # Small dedicated pool so health probes never queue behind user queries
+            self.health_pool = await asyncpg.create_pool(
+                **self.conn_kwargs,
+                min_size=1,
+                max_size=health_max_size,
+                command_timeout=2,
+                statement_cache_size=pool_options['statement_cache_size']
+            )
+            # Read-only sessions let PostgreSQL skip write bookkeeping for lookups
+            self.read_pool = await asyncpg.create_pool(
+                **self.conn_kwargs,
+                min_size=min(2, read_max_size),
+                max_size=read_max_size,
+                server_settings=read_settings,
+                **pool_options
+            )
+            # Writes (inserts, updates, deletes, DDL)
+            self.pool = await asyncpg.create_pool(
+                **self.conn_kwargs,
+                min_size=1,
+                max_size=write_max_size,
+                **pool_options
             )
+            return self.pool
         except Exception as e:
-            print(f"Error connecting to database: {e}")
+            logger.error("Error creating connection pool: %s", e)
+            # Don't leak pools created before the failure; a retry starts from scratch
+            await self.close_pool()
             raise
 
-    def test_connection(self):
+    async def ensure_pool(self):
+        """Create the pools if they aren't up yet, e.g. when the database was down at startup"""
+        if self.pool is not None:
+            return self.pool
+        
+        async with self._init_lock:
+            # init_pool returns early if another caller created the pools while we waited
+            return await self.init_pool()
+
+    async def close_pool(self):
+        """Close the shared connection pools"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+        if self.read_pool is not None:
+            await self.read_pool.close()
+            self.read_pool = None
+        if self.health_pool is not None:
+            await self.health_pool.close()
+            self.health_pool = None
+
+    async def test_connection(self):
         """Test the database connection"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1;")
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
+            await self.ensure_pool()
+            result = await self.health_pool.fetchval("SELECT 1;")
             return result is not None
         except Exception as e:
-            print(f"Database connection test failed: {e}")
+            logger.error("Database connection test failed: %s", e)
             return False
 
 # Global database config instance
@@ -1,12 +1,44 @@
+import logging
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+import orjson
+from typing import AsyncIterator, List, Optional, Dict, Any
 from config.database import db_config
 
+logger = logging.getLogger(__name__)
+
+# Tables don't disappear at runtime, so a positive existence check is remembered
+_table_exists_cache: Optional[bool] = None
+
+# Explicit column lists; list/search queries skip the potentially large raw_content
+METADATA_COLUMNS = "id, title, direct_link, created_at, updated_at"
+FULL_COLUMNS = "id, title, raw_content, direct_link, created_at, updated_at"
+
+# Schema changes can run far longer than the pools' 10s command_timeout on a large table
+DDL_TIMEOUT = 3600  # seconds
+
+# Arbitrary advisory lock key so only one worker process builds indexes at a time
+INDEX_BUILD_LOCK_ID = 4827301
+
+# Newest-first listing shared by get_all and get_all_json;
+# LIMIT NULL means no limit, so one cached statement serves both paged and full listings
+LIST_QUERY = f"SELECT {METADATA_COLUMNS} FROM articles ORDER BY created_at DESC LIMIT $1 OFFSET $2;"
+
+# Insert or, when direct_link already exists, update in a single statement
+UPSERT_QUERY = """
+INSERT INTO articles (title, raw_content, direct_link) 
+VALUES ($1, $2, $3)
+ON CONFLICT (direct_link) DO UPDATE SET
+    title = EXCLUDED.title,
+    raw_content = COALESCE(EXCLUDED.raw_content, articles.raw_content),
+    updated_at = CURRENT_TIMESTAMP
+RETURNING id, created_at, updated_at;
+"""
+
 class Article:
     """Article model for database operations"""
     
     def __init__(self, id: Optional[int] = None, title: str = "", 
-                 raw_content: str = "", direct_link: str = "", 
+                 raw_content: Optional[str] = "", direct_link: str = "", 
                  created_at: Optional[datetime] = None, 
                  updated_at: Optional[datetime] = None):
         self.id = id
@@ -29,26 +61,44 @@ class Article:
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Article':
-        """Create article instance from dictionary"""
+        """Create article instance from dictionary (raw_content is None when not loaded)"""
         return cls(
             id=data.get('id'),
             title=data.get('title', ''),
-            raw_content=data.get('raw_content', ''),
+            raw_content=data.get('raw_content'),
             direct_link=data.get('direct_link', ''),
             created_at=data.get('created_at'),
             updated_at=data.get('updated_at')
         )
 
     @staticmethod
-    def create_table() -> bool:
+    async def create_table(if_not_exists: bool = True, build_indexes: bool = True) -> bool:
+        """Create the articles table and its indexes (idempotent unless if_not_exists is False)"""
+        if not await Article._create_table(drop_existing=False, if_not_exists=if_not_exists):
+            return False
+        if build_indexes:
+            await Article.create_indexes()
+        return True
+
+    @staticmethod
+    async def recreate_table() -> bool:
+        """Drop and recreate the articles table - destroys all stored articles"""
+        if not await Article._create_table(drop_existing=True, if_not_exists=False):
+            return False
+        await Article.create_indexes()
+        return True
+
+    @staticmethod
+    async def _create_table(drop_existing: bool, if_not_exists: bool) -> bool:
         """Create the articles table with specified columns"""
+        global _table_exists_cache
         
-        # Drop table if exists (optional - remove if you don't want to overwrite)
-        drop_query = "DROP TABLE IF EXISTS articles;"
+        # Only recreate_table() drops existing data
+        drop_query = "DROP TABLE IF EXISTS articles;" if drop_existing else ""
         
         # Create table query
-        create_query = """
-        CREATE TABLE articles (
+        create_query = f"""
+        CREATE TABLE {'IF NOT EXISTS ' if if_not_exists else ''}articles (
             id SERIAL PRIMARY KEY,
             title VARCHAR(500) NOT NULL,
             raw_content TEXT,
@@ -58,66 +108,125 @@ class Article:
         );
         """
         
-        # Create index for better performance on common searches
-        index_query = """
-        CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title);
-        CREATE INDEX IF NOT EXISTS idx_articles_direct_link ON articles(direct_link);
+        # Verify creation inside the same batch; raising aborts the whole transaction
+        verify_query = """
+        DO $$
+        BEGIN
+            IF to_regclass('articles') IS NULL THEN
+                RAISE EXCEPTION 'articles table was not created';
+            END IF;
+        END
+        $$;
         """
         
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            
-            print("Creating articles table...")
-            
-            # Execute drop (optional)
-            cursor.execute(drop_query)
-            
-            # Execute create
-            cursor.execute(create_query)
-            print("Articles table created successfully!")
-            
-            # Create indexes
-            cursor.execute(index_query)
-            print("Indexes created successfully!")
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
+            await db_config.ensure_pool()
+            async with db_config.pool.acquire() as conn:
+                logger.info("Creating articles table if missing...")
+                
+                # Send every statement as one multi-statement query: the whole batch
+                # reaches the server in a single round trip and runs in one implicit
+                # transaction, so any failure rolls all of it back
+                await conn.execute(drop_query + create_query + verify_query, timeout=DDL_TIMEOUT)
             
-            # Verify table creation
-            if Article.table_exists():
-                print("Table 'articles' confirmed in database")
-                return True
-            else:
-                print("Warning: Could not verify table creation")
-                return False
+            _table_exists_cache = True
+            logger.info("Table 'articles' created and confirmed in database")
+            return True
+        except Exception as e:
+            logger.error("Error creating table: %s", e)
+            return False
+
+    @staticmethod
+    async def create_indexes() -> bool:
+        """Build missing indexes without blocking writes, returns False if any could not be built"""
+        # Index for better performance on common searches
+        # (created_at DESC index lets listings read rows pre-sorted and stop at LIMIT)
+        indexes = {
+            'idx_articles_direct_link': 'articles(direct_link)',
+            'idx_articles_created_at_desc': 'articles(created_at DESC)'
+        }
+        
+        try:
+            await db_config.ensure_pool()
+            async with db_config.pool.acquire() as conn:
+                # Only one worker process builds indexes at a time; the others skip
+                if not await conn.fetchval("SELECT pg_try_advisory_lock($1);", INDEX_BUILD_LOCK_ID):
+                    logger.info("Index build already running in another process, skipping")
+                    return True
                 
+                try:
+                    all_built = True
+                    for name, definition in indexes.items():
+                        try:
+                            await Article._create_index_concurrently(conn, name, definition)
+                        except Exception as e:
+                            logger.warning("Could not create index %s: %s", name, e)
+                            all_built = False
+                    
+                    if not await Article._create_title_search_index(conn):
+                        all_built = False
+                    return all_built
+                finally:
+                    await conn.execute("SELECT pg_advisory_unlock($1);", INDEX_BUILD_LOCK_ID)
         except Exception as e:
-            print(f"Error creating table: {e}")
+            logger.error("Error creating indexes: %s", e)
             return False
 
     @staticmethod
-    def table_exists() -> bool:
-        """Check if articles table exists"""
+    async def _create_index_concurrently(conn, name: str, definition: str) -> None:
+        """Create one index with CREATE INDEX CONCURRENTLY, rebuilding it if an earlier build was interrupted"""
+        # An interrupted concurrent build leaves an invalid index that IF NOT EXISTS would skip forever
+        invalid = await conn.fetchval(
+            "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1);", name
+        )
+        if invalid:
+            logger.warning("Rebuilding invalid index %s", name)
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};", timeout=DDL_TIMEOUT)
+        
+        # CONCURRENTLY can't run inside a transaction block, so each index is its own statement
+        await conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition};", timeout=DDL_TIMEOUT)
+
+    @staticmethod
+    async def _create_title_search_index(conn) -> bool:
+        """Create the trigram index that lets search_by_title's ILIKE '%query%' avoid a sequential scan"""
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            
-            query = "SELECT table_name FROM information_schema.tables WHERE table_name='articles';"
-            cursor.execute(query)
-            result = cursor.fetchone()
-            
-            cursor.close()
-            conn.close()
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;", timeout=DDL_TIMEOUT)
+            await Article._create_index_concurrently(
+                conn, 'idx_articles_title_trgm', 'articles USING gin (title gin_trgm_ops)'
+            )
+        except Exception as e:
+            # Typically the role lacks CREATE on the database or contrib isn't installed
+            logger.warning(
+                "Could not create pg_trgm title index, title search will use a sequential scan: %s", e
+            )
+            return False
+        
+        # Replaced by the trigram index; ILIKE '%query%' could never use this btree
+        await conn.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_articles_title;", timeout=DDL_TIMEOUT)
+        return True
+
+    @staticmethod
+    async def table_exists() -> bool:
+        """Check if articles table exists (cached once found)"""
+        global _table_exists_cache
+        if _table_exists_cache:
+            return True
+        
+        try:
+            await db_config.ensure_pool()
+            # to_regclass is a syscache lookup, far cheaper than scanning information_schema
+            query = "SELECT to_regclass('articles') IS NOT NULL;"
+            result = await db_config.health_pool.fetchval(query)
             
-            return result is not None
+            if result:
+                _table_exists_cache = True
+            return bool(result)
         except Exception as e:
-            print(f"Error checking table existence: {e}")
+            logger.error("Error checking table existence: %s", e)
             return False
 
     @staticmethod
-    def get_table_structure() -> List[Dict[str, Any]]:
+    async def get_table_structure() -> List[Dict[str, Any]]:
         """Get the structure of the articles table"""
         query = """
         SELECT column_name, data_type, character_maximum_length, is_nullable, column_default
@@ -127,185 +236,246 @@ class Article:
         """
         
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query)
-            results = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            await db_config.ensure_pool()
+            results = await db_config.read_pool.fetch(query)
             
             return [dict(row) for row in results]
         except Exception as e:
-            print(f"Error getting table structure: {e}")
+            logger.error("Error getting table structure: %s", e)
             return []
 
-    def save(self) -> Optional[int]:
+    async def save(self) -> Optional[int]:
         """Insert or update article in the database"""
         if self.id:
-            return self._update()
+            return await self._update()
         else:
-            return self._insert()
+            return await self._insert()
     
-    def _insert(self) -> Optional[int]:
+    async def _insert(self) -> Optional[int]:
         """Insert a new article into the table"""
         query = """
         INSERT INTO articles (title, raw_content, direct_link) 
-        VALUES (%s, %s, %s) RETURNING id, created_at, updated_at;
+        VALUES ($1, $2, $3) RETURNING id, created_at, updated_at;
         """
         
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(query, (self.title, self.raw_content, self.direct_link))
-            result = cursor.fetchone()
+            await db_config.ensure_pool()
+            result = await db_config.pool.fetchrow(query, self.title, self.raw_content, self.direct_link)
             
             self.id = result['id']
             self.created_at = result['created_at']
             self.updated_at = result['updated_at']
             
-            conn.commit()
-            cursor.close()
-            conn.close()
-            
-            print(f"Article inserted successfully with ID: {self.id}")
+            logger.debug("Article inserted successfully with ID: %s", self.id)
             return self.id
         except Exception as e:
-            print(f"Error inserting article: {e}")
+            logger.error("Error inserting article: %s", e)
             return None
     
-    def _update(self) -> Optional[int]:
+    async def _update(self) -> Optional[int]:
         """Update existing article"""
         query = """
         UPDATE articles 
-        SET title = %s, raw_content = %s, direct_link = %s, updated_at = CURRENT_TIMESTAMP
-        WHERE id = %s
+        SET title = $1, raw_content = COALESCE($2, raw_content), direct_link = $3, updated_at = CURRENT_TIMESTAMP
+        WHERE id = $4
         RETURNING updated_at;
         """
         
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute(query, (self.title, self.raw_content, self.direct_link, self.id))
-            result = cursor.fetchone()
+            await db_config.ensure_pool()
+            result = await db_config.pool.fetchrow(query, self.title, self.raw_content, self.direct_link, self.id)
             
             if result:
                 self.updated_at = result['updated_at']
-                conn.commit()
-                cursor.close()
-                conn.close()
-                print(f"Article {self.id} updated successfully")
+                logger.debug("Article %s updated successfully", self.id)
                 return self.id
             else:
-                cursor.close()
-                conn.close()
-                print(f"Article {self.id} not found")
+                logger.debug("Article %s not found", self.id)
                 return None
                 
         except Exception as e:
-            print(f"Error updating article: {e}")
+            logger.error("Error updating article: %s", e)
             return None
 
-    @staticmethod
-    def get_all() -> List['Article']:
-        """Retrieve all articles from the table"""
-        query = "SELECT * FROM articles ORDER BY created_at DESC;"
+    async def upsert(self) -> Optional[int]:
+        """Insert article or update the existing row with the same direct_link"""
+        try:
+            await db_config.ensure_pool()
+            result = await db_config.pool.fetchrow(UPSERT_QUERY, self.title, self.raw_content, self.direct_link)
+            
+            self.id = result['id']
+            self.created_at = result['created_at']
+            self.updated_at = result['updated_at']
+            
+            logger.debug("Article upserted successfully with ID: %s", self.id)
+            return self.id
+        except Exception as e:
+            logger.error("Error upserting article: %s", e)
+            return None
+
+    @classmethod
+    async def bulk_insert(cls, articles: List['Article']) -> int:
+        """Insert many new articles in one COPY operation, returns number of rows inserted"""
+        # COPY doesn't return ids/timestamps, and the whole batch fails on a duplicate direct_link
+        if not articles:
+            return 0
+        
+        records = [(a.title, a.raw_content, a.direct_link) for a in articles]
         
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query)
-            results = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            await db_config.ensure_pool()
+            # asyncpg returns the command status tag, e.g. "COPY 250"
+            status = await db_config.pool.copy_records_to_table(
+                'articles',
+                records=records,
+                columns=('title', 'raw_content', 'direct_link')
+            )
+            inserted_rows = int(status.split()[-1])
+            
+            logger.debug("%s articles inserted successfully", inserted_rows)
+            return inserted_rows
+        except Exception as e:
+            logger.error("Error bulk inserting articles: %s", e)
+            return 0
+
+    @classmethod
+    async def bulk_upsert(cls, articles: List['Article']) -> int:
+        """Upsert many articles by direct_link in one pipelined batch, returns number of rows written"""
+        if not articles:
+            return 0
+        
+        records = [(a.title, a.raw_content, a.direct_link) for a in articles]
+        
+        try:
+            await db_config.ensure_pool()
+            await db_config.pool.executemany(UPSERT_QUERY, records)
+            
+            logger.debug("%s articles upserted successfully", len(records))
+            return len(records)
+        except Exception as e:
+            logger.error("Error bulk upserting articles: %s", e)
+            return 0
+
+    @staticmethod
+    async def get_all(limit: Optional[int] = None, offset: int = 0) -> List['Article']:
+        """Retrieve articles newest first (metadata only, without raw_content), all when limit is None"""
+        try:
+            await db_config.ensure_pool()
+            results = await db_config.read_pool.fetch(LIST_QUERY, limit, offset)
             
             return [Article.from_dict(dict(row)) for row in results]
         except Exception as e:
-            print(f"Error retrieving articles: {e}")
+            logger.error("Error retrieving articles: %s", e)
             return []
 
     @staticmethod
-    def get_by_id(article_id: int) -> Optional['Article']:
-        """Retrieve article by ID"""
-        query = "SELECT * FROM articles WHERE id = %s;"
+    async def get_all_json(limit: Optional[int] = None, offset: int = 0) -> bytes:
+        """Retrieve articles newest first (metadata only) as a JSON array, raising on database errors"""
+        await db_config.ensure_pool()
+        results = await db_config.read_pool.fetch(LIST_QUERY, limit, offset)
+        
+        # Skip Article/to_dict round trip; orjson encodes datetimes natively
+        return orjson.dumps([dict(row) for row in results])
+
+    @staticmethod
+    async def iter_all(batch_size: int = 500) -> AsyncIterator['Article']:
+        """Stream all articles (including raw_content) through a server-side cursor"""
+        query = f"SELECT {FULL_COLUMNS} FROM articles ORDER BY created_at DESC;"
+        
+        try:
+            await db_config.ensure_pool()
+            async with db_config.read_pool.acquire() as conn:
+                # Cursors only live inside a transaction
+                async with conn.transaction():
+                    async for record in conn.cursor(query, prefetch=batch_size):
+                        yield Article.from_dict(dict(record))
+        except Exception as e:
+            # Re-raise so a stream cut short isn't mistaken for the complete table
+            logger.error("Error streaming articles: %s", e)
+            raise
+
+    @staticmethod
+    async def get_by_id(article_id: int) -> Optional['Article']:
+        """Retrieve article metadata by ID (without raw_content)"""
+        query = f"SELECT {METADATA_COLUMNS} FROM articles WHERE id = $1;"
+        
+        try:
+            await db_config.ensure_pool()
+            result = await db_config.read_pool.fetchrow(query, article_id)
+            
+            if result:
+                return Article.from_dict(dict(result))
+            return None
+        except Exception as e:
+            logger.error("Error retrieving article: %s", e)
+            return None
+
+    @staticmethod
+    async def get_by_id_full(article_id: int) -> Optional['Article']:
+        """Retrieve article by ID including raw_content"""
+        query = f"SELECT {FULL_COLUMNS} FROM articles WHERE id = $1;"
         
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, (article_id,))
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
+            await db_config.ensure_pool()
+            result = await db_config.read_pool.fetchrow(query, article_id)
             
             if result:
                 return Article.from_dict(dict(result))
             return None
         except Exception as e:
-            print(f"Error retrieving article: {e}")
+            logger.error("Error retrieving article: %s", e)
             return None
 
     @staticmethod
-    def get_by_link(direct_link: str) -> Optional['Article']:
+    async def get_by_link(direct_link: str) -> Optional['Article']:
         """Retrieve article by direct link"""
-        query = "SELECT * FROM articles WHERE direct_link = %s;"
+        query = f"SELECT {FULL_COLUMNS} FROM articles WHERE direct_link = $1;"
         
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, (direct_link,))
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
+            await db_config.ensure_pool()
+            result = await db_config.read_pool.fetchrow(query, direct_link)
             
             if result:
                 return Article.from_dict(dict(result))
             return None
         except Exception as e:
-            print(f"Error retrieving article: {e}")
+            logger.error("Error retrieving article: %s", e)
             return None
 
-    def delete(self) -> bool:
+    async def delete(self) -> bool:
         """Delete this article from database"""
         if not self.id:
             return False
             
-        query = "DELETE FROM articles WHERE id = %s;"
+        query = "DELETE FROM articles WHERE id = $1;"
         
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, (self.id,))
-            deleted_rows = cursor.rowcount
-            conn.commit()
-            cursor.close()
-            conn.close()
+            await db_config.ensure_pool()
+            # asyncpg returns the command status tag, e.g. "DELETE 1"
+            status = await db_config.pool.execute(query, self.id)
+            deleted_rows = int(status.split()[-1])
             
             if deleted_rows > 0:
-                print(f"Article {self.id} deleted successfully")
+                logger.debug("Article %s deleted successfully", self.id)
                 return True
             else:
-                print(f"Article {self.id} not found")
+                logger.debug("Article %s not found", self.id)
                 return False
                 
         except Exception as e:
-            print(f"Error deleting article: {e}")
+            logger.error("Error deleting article: %s", e)
             return False
 
     @staticmethod
-    def search_by_title(title_query: str) -> List['Article']:
-        """Search articles by title (case-insensitive partial match)"""
-        query = "SELECT * FROM articles WHERE title ILIKE %s ORDER BY created_at DESC;"
+    async def search_by_title(title_query: str) -> List['Article']:
+        """Search articles by title (case-insensitive partial match, without raw_content)"""
+        query = f"SELECT {METADATA_COLUMNS} FROM articles WHERE title ILIKE $1 ORDER BY created_at DESC;"
         
         try:
-            conn = db_config.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, (f'%{title_query}%',))
-            results = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            await db_config.ensure_pool()
+            results = await db_config.read_pool.fetch(query, f'%{title_query}%')
             
             return [Article.from_dict(dict(row)) for row in results]
         except Exception as e:
-            print(f"Error searching articles: {e}")
+            logger.error("Error searching articles: %s", e)
             return []
\ No newline at end of file